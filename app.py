@@ -1,10 +1,30 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, abort
 from flask_sqlalchemy import SQLAlchemy
+from flask_caching import Cache
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import bindparam, delete, event, func, insert, lambda_stmt, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import contains_eager, joinedload, lazyload, load_only, make_transient_to_detached, selectinload
 from werkzeug.security import generate_password_hash, check_password_hash
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from decimal import Decimal
+from logging.handlers import QueueHandler, QueueListener
+import atexit
 import os
 import logging
+import queue
+import sqlite3
+import stat
+
+# gevent is only present when running under gunicorn's gevent workers
+try:
+    from gevent import get_hub, monkey as gevent_monkey
+except ImportError:
+    gevent_monkey = None
 
 # OpenTelemetry imports
 try:
@@ -16,31 +36,107 @@ except ImportError:
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///smallcart.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///smallcart.db')
+# Checkout needs INSERT ... RETURNING and add_to_cart an ON CONFLICT upsert
+if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() not in ('sqlite', 'postgresql'):
+    raise RuntimeError("DATABASE_URL must point at SQLite or PostgreSQL")
+if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    # Server databases get a persistent connection pool sized for concurrent workers
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': 20,
+        'max_overflow': 10,
+        'pool_pre_ping': True,
+    }
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Caching is off (NullCache) unless a Redis URL is configured; Redis is shared, so
+# invalidate_catalog_cache() reaches every gunicorn worker
+app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL')
+app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'RedisCache' if app.config['CACHE_REDIS_URL'] else 'NullCache')
+app.config['CACHE_DEFAULT_TIMEOUT'] = 60
+
+# Persist compiled templates so freshly started workers skip the Jinja parser. Jinja
+# marshal-loads these files, so the directory must be private to this user: by default
+# Jinja picks a per-uid, 0700, owner-checked directory; JINJA_CACHE_DIR is held to the same rules.
+jinja_cache_dir = os.getenv('JINJA_CACHE_DIR')
+if jinja_cache_dir:
+    os.makedirs(jinja_cache_dir, mode=0o700, exist_ok=True)
+    jinja_cache_stat = os.lstat(jinja_cache_dir)
+    if (not stat.S_ISDIR(jinja_cache_stat.st_mode) or jinja_cache_stat.st_uid != os.getuid()
+            or jinja_cache_stat.st_mode & 0o077):
+        raise RuntimeError(f"JINJA_CACHE_DIR {jinja_cache_dir} must be a directory owned by this user with mode 0700")
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(jinja_cache_dir, '__jinja2_%s.cache')
+
+# Configure logging; request threads only enqueue records, a background
+# listener thread does the formatting and file/stream writes
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_handlers = [
+    logging.FileHandler('/var/log/smallcart.log' if os.path.exists('/var/log/') else 'smallcart.log'),
+    logging.StreamHandler()
+]
+for handler in log_handlers:
+    handler.setFormatter(log_formatter)
+
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# The listener's handlers apply the real format; the queue side only renders the message
+queue_handler = QueueHandler(log_queue)
+queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+
+# Initialize OpenTelemetry if available and enabled (OTEL_ENABLED=1)
+if TELEMETRY_ENABLED:
+    try:
+        app = instrument_flask_app(app)
+        TELEMETRY_ENABLED = 'telemetry' in app.config
+    except ImportError as e:
+        # The SDK, exporters and instrumentors are only imported once OTEL_ENABLED=1
+        print(f"⚠️  OpenTelemetry instrumentation unavailable ({e}), running without telemetry")
+        TELEMETRY_ENABLED = False
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/var/log/smallcart.log' if os.path.exists('/var/log/') else 'smallcart.log'),
-        logging.StreamHandler()
-    ]
-)
-
-# Initialize OpenTelemetry if available
 if TELEMETRY_ENABLED:
-    app = instrument_flask_app(app)
     log_with_trace("🔧 OpenTelemetry instrumentation enabled")
 else:
     log_with_trace = lambda msg, level=logging.INFO: logging.log(level, msg)
 
+# Resolve the metric instruments used by routes once, instead of on every request
+telemetry = app.config.get('telemetry') if TELEMETRY_ENABLED else None
+user_registrations_counter = telemetry['user_registrations'] if telemetry else None
+orders_counter = telemetry['orders_total'] if telemetry else None
+
+# Route metrics only ever use these label sets; share the dicts instead of building them per call
+REGISTRATION_LABELS = {"registration_method": "web"}
+ORDER_LABELS = {
+    is_admin: {"user_type": "admin" if is_admin else "customer", "order_status": "pending"}
+    for is_admin in (False, True)
+}
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    """Use WAL journaling on SQLite so readers don't block the writer"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+
 db = SQLAlchemy(app)
+cache = Cache(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+# Page size for paginated order and product listings
+PER_PAGE = 25
+
+# Explicit KDF cost so upgrades are a deliberate choice; raise it as hardware gets faster
+PASSWORD_HASH_METHOD = 'pbkdf2:sha256:600000'
+
+# pbkdf2 releases the GIL, so hashing on a bounded pool keeps request threads free
+password_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='password-hash')
+
 # Database Models
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -54,38 +150,59 @@ class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Numeric(10, 2), nullable=False)
     stock = db.Column(db.Integer, default=0)
     image_url = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    order_items = db.relationship('OrderItem', back_populates='product')
+    cart_items = db.relationship('CartItem', back_populates='product')
 
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    total_amount = db.Column(db.Float, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    total_amount = db.Column(db.Numeric(10, 2), nullable=False)
     status = db.Column(db.String(50), default='pending')  # pending, processing, shipped, delivered, cancelled
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    order_items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # selectin loads items for a whole batch of orders in one IN query; avoid lazy='dynamic',
+    # which returns a query per order and can't be eager-loaded
+    order_items = db.relationship('OrderItem', backref='order', lazy='selectin', cascade='all, delete-orphan')
 
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
-    price = db.Column(db.Float, nullable=False)
-    product = db.relationship('Product', backref='order_items')
+    price = db.Column(db.Numeric(10, 2), nullable=False)
+    product = db.relationship('Product', back_populates='order_items')
 
 class CartItem(db.Model):
+    # One row per (user, product); also serves user_id lookups via its leading column
+    __table_args__ = (db.Index('ix_cart_user_product', 'user_id', 'product_id', unique=True),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False, default=1)
     user = db.relationship('User', backref='cart_items')
-    product = db.relationship('Product', backref='cart_items')
+    product = db.relationship('Product', back_populates='cart_items')
+
+@cache.memoize(timeout=60)
+def get_user(user_id):
+    """Cached login identity of a user as a plain dict, or None if it doesn't exist;
+    call cache.delete_memoized(get_user, user_id) after changing a user"""
+    # Only these columns go into the (possibly shared) cache; never the password hash
+    user = User.query.options(load_only(User.username, User.email, User.is_admin)).get(user_id)
+    return {'id': user.id, 'username': user.username, 'email': user.email, 'is_admin': user.is_admin} if user else None
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_data = get_user(int(user_id))
+    if user_data is None:
+        return None
+    # Attach as a persistent row without a SELECT; unset columns load lazily on access
+    user = User(**user_data)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
 
 # Helper function to check if user is admin
 def admin_required(f):
@@ -97,17 +214,75 @@ def admin_required(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+def run_in_password_pool(fn, *args, **kwargs):
+    # Under gevent, executor threads are greenlets; use the hub's native thread pool instead
+    if gevent_monkey is not None and gevent_monkey.is_module_patched('threading'):
+        return get_hub().threadpool.apply(fn, args, kwargs)
+    return password_executor.submit(fn, *args, **kwargs).result()
+
+def hash_password(password):
+    return run_in_password_pool(generate_password_hash, password, method=PASSWORD_HASH_METHOD)
+
+def verify_password(password_hash, password):
+    return run_in_password_pool(check_password_hash, password_hash, password)
+
+def load_cart(user_id, *product_columns):
+    """A user's cart items with their products, plus the cart total.
+
+    The total is a window SUM over the same SELECT that loads the items, so it
+    always matches the rows returned. product_columns limits the product
+    columns loaded.
+    """
+    product_loader = contains_eager(CartItem.product)
+    if product_columns:
+        product_loader = product_loader.load_only(*product_columns)
+    rows = db.session.execute(
+        select(CartItem, func.sum(CartItem.quantity * Product.price).over())
+        .join(CartItem.product)
+        .options(product_loader)
+        .where(CartItem.user_id == user_id)
+    ).all()
+    return [cart_item for cart_item, _ in rows], (rows[0][1] if rows else Decimal('0'))
+
+# Cached pages must not capture flash messages meant for a single visitor
+def has_pending_flashes():
+    return '_flashes' in session
+
+@cache.memoize(timeout=300)
+def get_product_summary(product_id):
+    """Cached id/name of a product as a plain dict, or None if it doesn't exist"""
+    product = Product.query.options(load_only(Product.name)).get(product_id)
+    return {'id': product.id, 'name': product.name} if product else None
+
+@cache.memoize(timeout=60)
+def get_dashboard_counts():
+    """Cached (products, orders, customers) totals shared by every admin"""
+    # All three counts in a single round trip
+    return tuple(db.session.execute(select(
+        select(func.count(Product.id)).scalar_subquery(),
+        select(func.count(Order.id)).scalar_subquery(),
+        select(func.count(User.id)).filter_by(is_admin=False).scalar_subquery()
+    )).one())
+
+def invalidate_catalog_cache(product_id=None):
+    # A cache outage should never fail the write that triggered the invalidation
+    try:
+        cache.delete('view//')
+        cache.delete_memoized(get_dashboard_counts)
+        if product_id is not None:
+            cache.delete_memoized(get_product_summary, product_id)
+    except Exception as e:
+        log_with_trace(f"Cache invalidation failed: {str(e)}", logging.WARNING)
+
 # Routes
 @app.route('/')
+@cache.cached(unless=lambda: current_user.is_authenticated or has_pending_flashes())
 def home():
     products = Product.query.all()
     return render_template('home.html', products=products)
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
-    if TELEMETRY_ENABLED and 'telemetry' in app.config:
-        telemetry = app.config['telemetry']
-    
     if request.method == 'POST':
         username = request.form['username']
         email = request.form['email']
@@ -128,14 +303,15 @@ def register():
         user = User(
             username=username,
             email=email,
-            password_hash=generate_password_hash(password)
+            password_hash=hash_password(password)
         )
         db.session.add(user)
         db.session.commit()
+        invalidate_catalog_cache()
         
         # Increment user registration metric
-        if TELEMETRY_ENABLED and 'telemetry' in app.config:
-            telemetry['user_registrations'].add(1, {"registration_method": "web"})
+        if user_registrations_counter is not None:
+            user_registrations_counter.add(1, REGISTRATION_LABELS)
         
         log_with_trace(f"User registered successfully: {username}", logging.INFO)
         flash('Registration successful!', 'success')
@@ -149,12 +325,13 @@ def login():
         email_or_username = request.form['email_or_username']
         password = request.form['password']
         
-        # Try to find user by email or username
-        user = User.query.filter(
-            (User.email == email_or_username) | (User.username == email_or_username)
-        ).first()
+        # Try to find user by email or username; lambda_stmt caches the compiled SQL across requests
+        stmt = lambda_stmt(lambda: select(User).where(
+            or_(User.email == email_or_username, User.username == email_or_username)
+        ).limit(1))
+        user = db.session.execute(stmt).scalar_one_or_none()
         
-        if user and check_password_hash(user.password_hash, password):
+        if user and verify_password(user.password_hash, password):
             login_user(user)
             flash('Login successful!', 'success')
             if user.is_admin:
@@ -172,35 +349,36 @@ def logout():
     flash('You have been logged out.', 'info')
     return redirect(url_for('home'))
 
+def cart_upsert_stmt(user_id, product_id):
+    """INSERT ... ON CONFLICT that adds one to the cart line (PostgreSQL/SQLite only)"""
+    dialect_insert = pg_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+    return dialect_insert(CartItem).values(
+        user_id=user_id,
+        product_id=product_id,
+        quantity=1
+    ).on_conflict_do_update(
+        index_elements=['user_id', 'product_id'],
+        set_={'quantity': CartItem.__table__.c.quantity + 1}
+    )
+
 @app.route('/add_to_cart/<int:product_id>')
 @login_required
 def add_to_cart(product_id):
-    product = Product.query.get_or_404(product_id)
-    
-    existing_item = CartItem.query.filter_by(
-        user_id=current_user.id,
-        product_id=product_id
-    ).first()
-    
-    if existing_item:
-        existing_item.quantity += 1
-    else:
-        cart_item = CartItem(
-            user_id=current_user.id,
-            product_id=product_id,
-            quantity=1
-        )
-        db.session.add(cart_item)
+    product = get_product_summary(product_id)
+    if product is None:
+        abort(404)
     
+    # Atomic increment-or-insert; relies on the unique (user_id, product_id) index
+    db.session.execute(cart_upsert_stmt(current_user.id, product_id))
     db.session.commit()
-    flash(f'{product.name} added to cart!', 'success')
+    
+    flash(f"{product['name']} added to cart!", 'success')
     return redirect(url_for('home'))
 
 @app.route('/cart')
 @login_required
 def cart():
-    cart_items = CartItem.query.filter_by(user_id=current_user.id).all()
-    total = sum(item.quantity * item.product.price for item in cart_items)
+    cart_items, total = load_cart(current_user.id)
     return render_template('cart.html', cart_items=cart_items, total=total)
 
 @app.route('/update_cart/<int:item_id>', methods=['POST'])
@@ -237,74 +415,95 @@ def remove_from_cart(item_id):
 @app.route('/checkout', methods=['POST'])
 @login_required
 def checkout():
-    if TELEMETRY_ENABLED and 'telemetry' in app.config:
-        telemetry = app.config['telemetry']
-    
-    cart_items = CartItem.query.filter_by(user_id=current_user.id).all()
+    # Order items only need each product's price; the total comes from the same
+    # statement, so it always agrees with the order items
+    cart_items, total_amount = load_cart(current_user.id, Product.price)
     
     if not cart_items:
         flash('Your cart is empty.', 'error')
         log_with_trace(f"Checkout failed - empty cart for user: {current_user.username}", logging.WARNING)
         return redirect(url_for('cart'))
     
-    total_amount = sum(item.quantity * item.product.price for item in cart_items)
-    
     log_with_trace(f"Checkout started for user: {current_user.username}, total: ${total_amount:.2f}", logging.INFO)
     
-    # Create order
-    order = Order(
-        user_id=current_user.id,
-        total_amount=total_amount,
-        status='pending'
+    # Reserve stock with one conditional executemany UPDATE; a product without
+    # enough stock matches no row, so a short rowcount means the cart can't be filled
+    product_table = Product.__table__
+    result = db.session.execute(
+        update(product_table)
+        .where(product_table.c.id == bindparam('pid'), product_table.c.stock >= bindparam('qty'))
+        .values(stock=product_table.c.stock - bindparam('qty')),
+        [{'pid': cart_item.product_id, 'qty': cart_item.quantity} for cart_item in cart_items]
     )
-    db.session.add(order)
-    db.session.flush()
+    if result.rowcount != len(cart_items):
+        db.session.rollback()
+        flash('Insufficient stock for one or more items in your cart.', 'error')
+        log_with_trace(f"Checkout failed - insufficient stock for user: {current_user.username}", logging.WARNING)
+        return redirect(url_for('cart'))
     
-    # Create order items
-    for cart_item in cart_items:
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=cart_item.product_id,
-            quantity=cart_item.quantity,
-            price=cart_item.product.price
-        )
-        db.session.add(order_item)
-        
-        # Update product stock
-        product = cart_item.product
-        product.stock -= cart_item.quantity
+    # Create order; RETURNING hands back the new id in the same statement
+    order_id = db.session.execute(
+        insert(Order)
+        .values(user_id=current_user.id, total_amount=total_amount, status='pending')
+        .returning(Order.id)
+    ).scalar_one()
+    
+    # Create order items in a single bulk INSERT
+    db.session.bulk_insert_mappings(OrderItem, [
+        {
+            'order_id': order_id,
+            'product_id': cart_item.product_id,
+            'quantity': cart_item.quantity,
+            'price': cart_item.product.price
+        }
+        for cart_item in cart_items
+    ])
     
-    # Clear cart
-    CartItem.query.filter_by(user_id=current_user.id).delete()
+    # Clear cart: take off exactly what was ordered, so a line added or topped up
+    # by a concurrent add_to_cart stays in the cart instead of being lost
+    cart_table = CartItem.__table__
+    db.session.execute(
+        update(cart_table)
+        .where(cart_table.c.id == bindparam('cid'))
+        .values(quantity=cart_table.c.quantity - bindparam('qty')),
+        [{'cid': cart_item.id, 'qty': cart_item.quantity} for cart_item in cart_items]
+    )
+    db.session.execute(
+        delete(cart_table).where(cart_table.c.user_id == current_user.id, cart_table.c.quantity <= 0)
+    )
     
     db.session.commit()
+    invalidate_catalog_cache()
     
     # Increment orders metric
-    if TELEMETRY_ENABLED and 'telemetry' in app.config:
-        telemetry['orders_total'].add(1, {
-            "user_type": "admin" if current_user.is_admin else "customer",
-            "order_status": "pending"
-        })
+    if orders_counter is not None:
+        orders_counter.add(1, ORDER_LABELS[bool(current_user.is_admin)])
     
-    log_with_trace(f"Order {order.id} placed successfully for user: {current_user.username}", logging.INFO)
+    log_with_trace(f"Order {order_id} placed successfully for user: {current_user.username}", logging.INFO)
     flash('Order placed successfully!', 'success')
     return redirect(url_for('order_history'))
 
 @app.route('/order_history')
 @login_required
 def order_history():
-    orders = Order.query.filter_by(user_id=current_user.id).order_by(Order.created_at.desc()).all()
-    return render_template('order_history.html', orders=orders)
+    page = request.args.get('page', 1, type=int)
+    pagination = Order.query.options(
+        selectinload(Order.order_items).joinedload(OrderItem.product).load_only(Product.name, Product.image_url)
+    ).filter_by(user_id=current_user.id).order_by(Order.created_at.desc()).paginate(
+        page=page, per_page=PER_PAGE, error_out=False
+    )
+    return render_template('order_history.html', pagination=pagination, orders=pagination.items)
 
 # Admin Routes
 @app.route('/admin')
 @login_required
 @admin_required
 def admin_dashboard():
-    total_products = Product.query.count()
-    total_orders = Order.query.count()
-    total_users = User.query.filter_by(is_admin=False).count()
-    recent_orders = Order.query.order_by(Order.created_at.desc()).limit(5).all()
+    total_products, total_orders, total_users = get_dashboard_counts()
+    # The dashboard shows each order's customer but not its items
+    recent_orders = Order.query.options(
+        joinedload(Order.user), lazyload(Order.order_items)
+    ).order_by(Order.created_at.desc()).limit(5).all()
     
     return render_template('admin/dashboard.html', 
                          total_products=total_products,
@@ -316,8 +515,9 @@ def admin_dashboard():
 @login_required
 @admin_required
 def admin_products():
-    products = Product.query.all()
-    return render_template('admin/products.html', products=products)
+    page = request.args.get('page', 1, type=int)
+    pagination = Product.query.order_by(Product.id).paginate(page=page, per_page=PER_PAGE, error_out=False)
+    return render_template('admin/products.html', pagination=pagination, products=pagination.items)
 
 @app.route('/admin/products/add', methods=['GET', 'POST'])
 @login_required
@@ -327,12 +527,13 @@ def admin_add_product():
         product = Product(
             name=request.form['name'],
             description=request.form['description'],
-            price=float(request.form['price']),
+            price=Decimal(request.form['price']),
             stock=int(request.form['stock']),
             image_url=request.form.get('image_url', '')
         )
         db.session.add(product)
         db.session.commit()
+        invalidate_catalog_cache()
         flash('Product added successfully!', 'success')
         return redirect(url_for('admin_products'))
     
@@ -347,11 +548,12 @@ def admin_edit_product(product_id):
     if request.method == 'POST':
         product.name = request.form['name']
         product.description = request.form['description']
-        product.price = float(request.form['price'])
+        product.price = Decimal(request.form['price'])
         product.stock = int(request.form['stock'])
         product.image_url = request.form.get('image_url', '')
         
         db.session.commit()
+        invalidate_catalog_cache(product_id)
         flash('Product updated successfully!', 'success')
         return redirect(url_for('admin_products'))
     
@@ -364,6 +566,7 @@ def admin_delete_product(product_id):
     product = Product.query.get_or_404(product_id)
     db.session.delete(product)
     db.session.commit()
+    invalidate_catalog_cache(product_id)
     flash('Product deleted successfully!', 'success')
     return redirect(url_for('admin_products'))
 
@@ -371,14 +574,26 @@ def admin_delete_product(product_id):
 @login_required
 @admin_required
 def admin_orders():
-    orders = Order.query.order_by(Order.created_at.desc()).all()
-    return render_template('admin/orders.html', orders=orders)
+    page = request.args.get('page', 1, type=int)
+    pagination = Order.query.options(
+        joinedload(Order.user),
+        selectinload(Order.order_items).joinedload(OrderItem.product).load_only(Product.name)
+    ).order_by(Order.created_at.desc()).paginate(page=page, per_page=PER_PAGE, error_out=False)
+    # Summary covers every order, not just the current page
+    status_counts = dict(db.session.query(Order.status, func.count(Order.id)).group_by(Order.status).all())
+    return render_template('admin/orders.html',
+                         pagination=pagination,
+                         orders=pagination.items,
+                         status_counts=status_counts)
 
 @app.route('/admin/orders/<int:order_id>')
 @login_required
 @admin_required
 def admin_view_order(order_id):
-    order = Order.query.get_or_404(order_id)
+    order = Order.query.options(
+        joinedload(Order.user),
+        selectinload(Order.order_items).joinedload(OrderItem.product)
+    ).get_or_404(order_id)
     return render_template('admin/view_order.html', order=order)
 
 @app.route('/admin/orders/edit/<int:order_id>', methods=['GET', 'POST'])
@@ -391,7 +606,7 @@ def admin_edit_order(order_id):
         order.status = request.form['status']
         # Update total_amount if provided
         if 'total_amount' in request.form and request.form['total_amount']:
-            order.total_amount = float(request.form['total_amount'])
+            order.total_amount = Decimal(request.form['total_amount'])
         
         db.session.commit()
         flash('Order updated successfully!', 'success')
@@ -405,7 +620,7 @@ def admin_edit_order(order_id):
 def admin_create_order():
     if request.method == 'POST':
         user_id = request.form['user_id']
-        total_amount = float(request.form['total_amount'])
+        total_amount = Decimal(request.form['total_amount'])
         status = request.form['status']
         
         # Validate user exists
@@ -421,6 +636,7 @@ def admin_create_order():
         )
         db.session.add(order)
         db.session.commit()
+        invalidate_catalog_cache()
         
         flash('Order created successfully!', 'success')
         return redirect(url_for('admin_orders'))
@@ -445,6 +661,7 @@ def admin_delete_order(order_id):
     order = Order.query.get_or_404(order_id)
     db.session.delete(order)
     db.session.commit()
+    invalidate_catalog_cache()
     flash('Order deleted successfully!', 'success')
     return redirect(url_for('admin_orders'))
 
@@ -455,29 +672,70 @@ def create_admin_user():
         admin = User(
             username='admin',
             email='admin@gmail.com',
-            password_hash=generate_password_hash('123456'),
+            password_hash=hash_password('123456'),
             is_admin=True
         )
         db.session.add(admin)
         db.session.commit()
         print("Default admin user created: email='admin@gmail.com', password='123456'")
 
+def merge_duplicate_cart_items():
+    """Fold duplicate (user_id, product_id) cart rows into one, summing quantities"""
+    duplicates = db.session.execute(
+        select(CartItem.user_id, CartItem.product_id, func.min(CartItem.id), func.sum(CartItem.quantity))
+        .group_by(CartItem.user_id, CartItem.product_id)
+        .having(func.count(CartItem.id) > 1)
+    ).all()
+    for user_id, product_id, keep_id, quantity in duplicates:
+        CartItem.query.filter_by(id=keep_id).update({'quantity': quantity})
+        CartItem.query.filter(
+            CartItem.user_id == user_id, CartItem.product_id == product_id, CartItem.id != keep_id
+        ).delete(synchronize_session=False)
+    db.session.commit()
+    return len(duplicates)
+
+def upgrade_schema():
+    """Add indexes that create_all() skips on tables that already exist"""
+    # ix_cart_user_product is unique and backs the add_to_cart upsert; rows from the old
+    # read-then-insert code may violate it
+    merged = merge_duplicate_cart_items()
+    if merged:
+        print(f"Merged {merged} duplicate cart rows")
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+    # Earlier versions also indexed username/email, duplicating their unique constraints
+    with db.engine.begin() as conn:
+        for name in ('ix_user_username', 'ix_user_email'):
+            conn.execute(text(f'DROP INDEX IF EXISTS {name}'))
+
+def init_db():
+    """Create tables, the default admin and sample products"""
+    db.create_all()
+    upgrade_schema()
+    create_admin_user()
+    
+    # Add some sample products if none exist
+    if Product.query.count() == 0:
+        sample_products = [
+            Product(name='Laptop', description='High-performance laptop', price=Decimal('999.99'), stock=10, image_url='https://via.placeholder.com/300x200?text=Laptop'),
+            Product(name='Smartphone', description='Latest smartphone', price=Decimal('699.99'), stock=15, image_url='https://via.placeholder.com/300x200?text=Smartphone'),
+            Product(name='Headphones', description='Wireless noise-cancelling headphones', price=Decimal('199.99'), stock=25, image_url='https://via.placeholder.com/300x200?text=Headphones'),
+            Product(name='Tablet', description='10-inch tablet with stylus', price=Decimal('449.99'), stock=20, image_url='https://via.placeholder.com/300x200?text=Tablet'),
+        ]
+        for product in sample_products:
+            db.session.add(product)
+        db.session.commit()
+        print("Sample products added!")
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Initialize the database before starting gunicorn"""
+    init_db()
+
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
-        create_admin_user()
-        
-        # Add some sample products if none exist
-        if Product.query.count() == 0:
-            sample_products = [
-                Product(name='Laptop', description='High-performance laptop', price=999.99, stock=10, image_url='https://via.placeholder.com/300x200?text=Laptop'),
-                Product(name='Smartphone', description='Latest smartphone', price=699.99, stock=15, image_url='https://via.placeholder.com/300x200?text=Smartphone'),
-                Product(name='Headphones', description='Wireless noise-cancelling headphones', price=199.99, stock=25, image_url='https://via.placeholder.com/300x200?text=Headphones'),
-                Product(name='Tablet', description='10-inch tablet with stylus', price=449.99, stock=20, image_url='https://via.placeholder.com/300x200?text=Tablet'),
-            ]
-            for product in sample_products:
-                db.session.add(product)
-            db.session.commit()
-            print("Sample products added!")
+        init_db()
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    app.run(debug=os.getenv('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)
@@ -6,15 +6,69 @@ Creates VPC, Subnet, Internet Gateway, Route Table, Security Group, and EC2 Inst
 
 import boto3
 import json
+import logging
+import os
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Final
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+# orjson is optional; it serializes straight to bytes in C
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger('smallcart.infra')
+
+# Inbound rules for the application security group, built once at import.
+# Always pass all rules in one IpPermissions list: one API call, one CloudTrail
+# entry, and no per-rule calls to run into RequestLimitExceeded.
+_INGRESS_RULES: Final = (
+    {
+        'IpProtocol': 'tcp',
+        'FromPort': 22,
+        'ToPort': 22,
+        'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': 'SSH access from anywhere'}]
+    },
+    {
+        'IpProtocol': 'tcp',
+        'FromPort': 5000,
+        'ToPort': 5000,
+        'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': 'Flask app access from anywhere'}]
+    },
+    {
+        'IpProtocol': 'tcp',
+        'FromPort': 80,
+        'ToPort': 80,
+        'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': 'HTTP access from anywhere'}]
+    },
+    {
+        'IpProtocol': 'tcp',
+        'FromPort': 443,
+        'ToPort': 443,
+        'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': 'HTTPS access from anywhere'}]
+    }
+)
+
 class SmallCartAWSInfrastructure:
     def __init__(self, region='eu-north-1'):
         """Initialize AWS clients"""
         self.region = region
-        self.ec2_client = boto3.client('ec2', region_name=region)
-        self.ec2_resource = boto3.resource('ec2', region_name=region)
+        
+        # One session shared by all clients; a pool large enough for parallel
+        # calls, keep-alive to reuse TLS connections, adaptive retry on throttling
+        client_config = Config(
+            max_pool_connections=50,
+            tcp_keepalive=True,
+            retries={'mode': 'adaptive', 'max_attempts': 10}
+        )
+        self._session = boto3.session.Session(region_name=region)
+        self.ec2_client = self._session.client('ec2', config=client_config)
+        self.ec2_resource = self._session.resource('ec2', config=client_config)
         
         # Infrastructure names and tags
         self.project_name = 'SmallCart'
@@ -24,42 +78,100 @@ class SmallCartAWSInfrastructure:
         self.ami_id = 'ami-0c4fc5dcabc9df21d'  # Amazon Linux 2023 AMI
         self.instance_type = 't3.micro'
         
+        # Poll every 2s instead of botocore's 15s so state changes are seen promptly;
+        # 300 attempts keeps the default ~10 minute timeout
+        self.waiter_config = {'Delay': 2, 'MaxAttempts': 300}
+        
         # Store created resources
         self.resources = {
             'vpc_id': 'vpc-06111db1e5a53d537',  # Use existing VPC
             'igw_id': 'igw-07c22c039aab2b501'   # Use existing Internet Gateway
         }
+        # Resources are recorded from several threads during deploy_infrastructure
+        self._resources_lock = threading.Lock()
+        
+        # Filled by the first _availability_zones() call
+        self._azs = None
+        
+        # (delete_fn, kwargs) for everything this run created, undone in reverse
+        # order if the deployment fails
+        self._cleanup_stack = []
+    
+    def _record_resource(self, key, value):
+        """Thread-safe update of self.resources"""
+        with self._resources_lock:
+            self.resources[key] = value
+        
+    def _push_cleanup(self, delete_fn, **kwargs):
+        """Register how to undo a creation; thread-safe like _record_resource"""
+        with self._resources_lock:
+            self._cleanup_stack.append((delete_fn, kwargs))
+    
+    def _terminate_instances(self, InstanceIds):
+        """Terminate instances and wait, so their subnet and security group can be deleted"""
+        self.ec2_client.terminate_instances(InstanceIds=InstanceIds)
+        waiter = self.ec2_client.get_waiter('instance_terminated')
+        waiter.wait(InstanceIds=InstanceIds, WaiterConfig=self.waiter_config)
+    
+    def rollback(self):
+        """Delete resources created by this run, newest first; returns True if all succeeded"""
+        with self._resources_lock:
+            cleanup_stack, self._cleanup_stack = self._cleanup_stack, []
+        
+        clean = True
+        for delete_fn, kwargs in reversed(cleanup_stack):
+            try:
+                delete_fn(**kwargs)
+                logger.info("   🗑️  %s %s", delete_fn.__name__, kwargs)
+            except Exception as e:
+                clean = False
+                logger.warning("⚠️  Warning: %s %s failed: %s", delete_fn.__name__, kwargs, e)
+        return clean
+    
+    def _availability_zones(self):
+        """Available AZ names in the region, looked up once per instance"""
+        if self._azs is None:
+            # zone-type excludes opted-in Local/Wavelength zones, whose names
+            # (e.g. eu-north-1-cph-1a) would otherwise sort ahead of eu-north-1a
+            response = self.ec2_client.describe_availability_zones(
+                Filters=[
+                    {'Name': 'state', 'Values': ['available']},
+                    {'Name': 'zone-type', 'Values': ['availability-zone']},
+                ]
+            )
+            self._azs = sorted(z['ZoneName'] for z in response['AvailabilityZones'])
+        return self._azs
         
-    def create_tags(self, resource_id, resource_type):
-        """Create tags for AWS resources"""
-        tags = [
+    def _tag_list(self, resource_type):
+        """Standard tags for a SmallCart resource"""
+        return [
             {'Key': 'Name', 'Value': f'{self.project_name}-{resource_type}'},
             {'Key': 'Project', 'Value': self.project_name},
             {'Key': 'Environment', 'Value': 'Production'},
             {'Key': 'CreatedBy', 'Value': 'SmallCart-Setup-Script'}
         ]
-        
-        try:
-            self.ec2_client.create_tags(Resources=[resource_id], Tags=tags)
-            print(f"✅ Tags created for {resource_type}: {resource_id}")
-        except Exception as e:
-            print(f"⚠️  Warning: Could not create tags for {resource_id}: {str(e)}")
+    
+    def _tag_specifications(self, aws_resource_type, resource_type):
+        """TagSpecifications for tagging a resource in its create call"""
+        return [{'ResourceType': aws_resource_type, 'Tags': self._tag_list(resource_type)}]
     
     def create_vpc(self):
         """Create VPC"""
-        print("\n🔄 Creating VPC...")
+        logger.info("\n🔄 Creating VPC...")
         
         try:
             response = self.ec2_client.create_vpc(
-                CidrBlock=self.vpc_cidr
+                CidrBlock=self.vpc_cidr,
+                TagSpecifications=self._tag_specifications('vpc', 'VPC')
             )
             
             vpc_id = response['Vpc']['VpcId']
-            self.resources['vpc_id'] = vpc_id
+            self._record_resource('vpc_id', vpc_id)
+            self._push_cleanup(self.ec2_client.delete_vpc, VpcId=vpc_id)
             
             # Wait for VPC to be available
             waiter = self.ec2_client.get_waiter('vpc_available')
-            waiter.wait(VpcIds=[vpc_id])
+            waiter.wait(VpcIds=[vpc_id], WaiterConfig=self.waiter_config)
             
             # Enable DNS support and hostnames
             self.ec2_client.modify_vpc_attribute(
@@ -72,56 +184,63 @@ class SmallCartAWSInfrastructure:
                 EnableDnsHostnames={'Value': True}
             )
             
-            self.create_tags(vpc_id, 'VPC')
-            print(f"✅ VPC created successfully: {vpc_id}")
+            logger.info("✅ VPC created successfully: %s", vpc_id)
             return vpc_id
             
         except Exception as e:
-            print(f"❌ Error creating VPC: {str(e)}")
+            logger.error("❌ Error creating VPC: %s", e)
             raise
     
     def create_internet_gateway(self):
         """Create and attach Internet Gateway"""
-        print("\n🔄 Creating Internet Gateway...")
+        logger.info("\n🔄 Creating Internet Gateway...")
         
         try:
             # Create Internet Gateway
-            response = self.ec2_client.create_internet_gateway()
+            response = self.ec2_client.create_internet_gateway(
+                TagSpecifications=self._tag_specifications('internet-gateway', 'InternetGateway')
+            )
             igw_id = response['InternetGateway']['InternetGatewayId']
-            self.resources['igw_id'] = igw_id
-            
-            self.create_tags(igw_id, 'InternetGateway')
+            self._record_resource('igw_id', igw_id)
+            self._push_cleanup(self.ec2_client.delete_internet_gateway, InternetGatewayId=igw_id)
             
             # Attach to VPC
             self.ec2_client.attach_internet_gateway(
                 InternetGatewayId=igw_id,
                 VpcId=self.resources['vpc_id']
             )
+            self._push_cleanup(
+                self.ec2_client.detach_internet_gateway,
+                InternetGatewayId=igw_id,
+                VpcId=self.resources['vpc_id']
+            )
             
-            print(f"✅ Internet Gateway created and attached: {igw_id}")
+            logger.info("✅ Internet Gateway created and attached: %s", igw_id)
             return igw_id
             
         except Exception as e:
-            print(f"❌ Error creating Internet Gateway: {str(e)}")
+            logger.error("❌ Error creating Internet Gateway: %s", e)
             raise
     
     def create_subnet(self):
         """Create public subnet"""
-        print("\n🔄 Creating Public Subnet...")
+        logger.info("\n🔄 Creating Public Subnet...")
         
         try:
             response = self.ec2_client.create_subnet(
                 VpcId=self.resources['vpc_id'],
                 CidrBlock=self.subnet_cidr,
-                AvailabilityZone=f'{self.region}a'
+                AvailabilityZone=self._availability_zones()[0],
+                TagSpecifications=self._tag_specifications('subnet', 'PublicSubnet')
             )
             
             subnet_id = response['Subnet']['SubnetId']
-            self.resources['subnet_id'] = subnet_id
+            self._record_resource('subnet_id', subnet_id)
+            self._push_cleanup(self.ec2_client.delete_subnet, SubnetId=subnet_id)
             
             # Wait for subnet to be available
             waiter = self.ec2_client.get_waiter('subnet_available')
-            waiter.wait(SubnetIds=[subnet_id])
+            waiter.wait(SubnetIds=[subnet_id], WaiterConfig=self.waiter_config)
             
             # Enable auto-assign public IP after creation
             self.ec2_client.modify_subnet_attribute(
@@ -129,28 +248,27 @@ class SmallCartAWSInfrastructure:
                 MapPublicIpOnLaunch={'Value': True}
             )
             
-            self.create_tags(subnet_id, 'PublicSubnet')
-            print(f"✅ Public Subnet created with auto-assign public IP: {subnet_id}")
+            logger.info("✅ Public Subnet created with auto-assign public IP: %s", subnet_id)
             return subnet_id
             
         except Exception as e:
-            print(f"❌ Error creating subnet: {str(e)}")
+            logger.error("❌ Error creating subnet: %s", e)
             raise
     
     def create_route_table(self):
         """Create route table and add route to Internet Gateway"""
-        print("\n🔄 Creating Route Table...")
+        logger.info("\n🔄 Creating Route Table...")
         
         try:
             # Create route table
             response = self.ec2_client.create_route_table(
-                VpcId=self.resources['vpc_id']
+                VpcId=self.resources['vpc_id'],
+                TagSpecifications=self._tag_specifications('route-table', 'PublicRouteTable')
             )
             
             route_table_id = response['RouteTable']['RouteTableId']
-            self.resources['route_table_id'] = route_table_id
-            
-            self.create_tags(route_table_id, 'PublicRouteTable')
+            self._record_resource('route_table_id', route_table_id)
+            self._push_cleanup(self.ec2_client.delete_route_table, RouteTableId=route_table_id)
             
             # Create route to Internet Gateway
             self.ec2_client.create_route(
@@ -160,135 +278,113 @@ class SmallCartAWSInfrastructure:
             )
             
             # Associate route table with subnet
-            self.ec2_client.associate_route_table(
+            association = self.ec2_client.associate_route_table(
                 RouteTableId=route_table_id,
                 SubnetId=self.resources['subnet_id']
             )
+            self._push_cleanup(
+                self.ec2_client.disassociate_route_table,
+                AssociationId=association['AssociationId']
+            )
             
-            print(f"✅ Route Table created and configured: {route_table_id}")
+            logger.info("✅ Route Table created and configured: %s", route_table_id)
             return route_table_id
             
         except Exception as e:
-            print(f"❌ Error creating route table: {str(e)}")
+            logger.error("❌ Error creating route table: %s", e)
             raise
     
+    def _create_route_table_after(self, subnet_future):
+        """Create the route table once the subnet it is associated with exists"""
+        subnet_future.result()
+        return self.create_route_table()
+    
     def create_security_group(self):
         """Create security group with rules for SSH and Flask app"""
-        print("\n🔄 Creating Security Group...")
+        logger.info("\n🔄 Creating Security Group...")
         
         try:
             # Create security group
             response = self.ec2_client.create_security_group(
                 GroupName=f'{self.project_name}-SecurityGroup',
                 Description='Security group for SmallCart Flask application',
-                VpcId=self.resources['vpc_id']
+                VpcId=self.resources['vpc_id'],
+                TagSpecifications=self._tag_specifications('security-group', 'SecurityGroup')
             )
             
             security_group_id = response['GroupId']
-            self.resources['security_group_id'] = security_group_id
-            
-            self.create_tags(security_group_id, 'SecurityGroup')
-            
-            # Add inbound rules
-            security_rules = [
-                {
-                    'IpProtocol': 'tcp',
-                    'FromPort': 22,
-                    'ToPort': 22,
-                    'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': 'SSH access from anywhere'}]
-                },
-                {
-                    'IpProtocol': 'tcp',
-                    'FromPort': 5000,
-                    'ToPort': 5000,
-                    'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': 'Flask app access from anywhere'}]
-                },
-                {
-                    'IpProtocol': 'tcp',
-                    'FromPort': 80,
-                    'ToPort': 80,
-                    'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': 'HTTP access from anywhere'}]
-                },
-                {
-                    'IpProtocol': 'tcp',
-                    'FromPort': 443,
-                    'ToPort': 443,
-                    'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': 'HTTPS access from anywhere'}]
-                }
-            ]
+            self._record_resource('security_group_id', security_group_id)
+            self._push_cleanup(self.ec2_client.delete_security_group, GroupId=security_group_id)
             
+            # Add all inbound rules in a single call (see _INGRESS_RULES)
             self.ec2_client.authorize_security_group_ingress(
                 GroupId=security_group_id,
-                IpPermissions=security_rules
+                IpPermissions=_INGRESS_RULES
             )
             
-            print(f"✅ Security Group created with rules: {security_group_id}")
-            print("   📝 Allowed inbound ports: 22 (SSH), 5000 (Flask), 80 (HTTP), 443 (HTTPS)")
+            logger.info("✅ Security Group created with rules: %s", security_group_id)
+            logger.info("   📝 Allowed inbound ports: 22 (SSH), 5000 (Flask), 80 (HTTP), 443 (HTTPS)")
             return security_group_id
             
         except Exception as e:
-            print(f"❌ Error creating security group: {str(e)}")
+            logger.error("❌ Error creating security group: %s", e)
             raise
     
     def check_key_pair(self):
         """Check if key pair exists"""
-        print(f"\n🔄 Checking for key pair: {self.key_pair_name}")
+        logger.info("\n🔄 Checking for key pair: %s", self.key_pair_name)
         
         try:
             response = self.ec2_client.describe_key_pairs(
                 KeyNames=[self.key_pair_name]
             )
-            print(f"✅ Key pair '{self.key_pair_name}' exists")
+            logger.info("✅ Key pair '%s' exists", self.key_pair_name)
             return True
             
         except ClientError as e:
             if e.response['Error']['Code'] == 'InvalidKeyPair.NotFound':
-                print(f"❌ Key pair '{self.key_pair_name}' not found!")
-                print(f"   Please create key pair '{self.key_pair_name}' in AWS Console first")
-                print(f"   Or upload your smallcart.pem file to AWS as a key pair")
+                logger.error("❌ Key pair '%s' not found!", self.key_pair_name)
+                logger.error("   Please create key pair '%s' in AWS Console first", self.key_pair_name)
+                logger.error("   Or upload your smallcart.pem file to AWS as a key pair")
                 return False
             else:
-                print(f"❌ Error checking key pair: {str(e)}")
+                logger.error("❌ Error checking key pair: %s", e)
                 return False
     
-    def create_ec2_instance(self):
-        """Create EC2 instance"""
-        print("\n🔄 Creating EC2 Instance...")
+    def create_ec2_instance(self, count=1):
+        """Create EC2 instance(s); all `count` instances come from one run_instances call"""
+        logger.info("\n🔄 Creating EC2 Instance...")
         
-        # User data script to set up the instance
-        user_data_script = """#!/bin/bash
-# Update system
-sudo yum update -y
-
-# Install Python 3 and pip
-sudo yum install -y python3 python3-pip git
-
-# Install required system packages
-sudo yum install -y gcc python3-devel
+        # cloud-init config: packages are installed by cloud-init's package
+        # module without the full `yum update` pass (package_upgrade stays off)
+        user_data_script = """#cloud-config
+packages:
+  - python3
+  - python3-pip
+  - git
+  - gcc
+  - python3-devel
 
-# Create application directory
-sudo mkdir -p /opt/smallcart
-sudo chown ec2-user:ec2-user /opt/smallcart
+write_files:
+  - path: /opt/smallcart/instance-status.txt
+    content: |
+      EC2 Instance ready for SmallCart deployment
 
-# Set up log file
-sudo touch /var/log/smallcart-setup.log
-sudo chown ec2-user:ec2-user /var/log/smallcart-setup.log
-
-# Log setup completion
-echo "$(date): SmallCart EC2 instance setup completed" >> /var/log/smallcart-setup.log
-echo "$(date): Python version: $(python3 --version)" >> /var/log/smallcart-setup.log
-echo "$(date): Pip version: $(pip3 --version)" >> /var/log/smallcart-setup.log
-
-# Create a simple status file
-echo "EC2 Instance ready for SmallCart deployment" > /opt/smallcart/instance-status.txt
-echo "Setup completed at: $(date)" >> /opt/smallcart/instance-status.txt
+runcmd:
+  - chown -R ec2-user:ec2-user /opt/smallcart
+  - touch /var/log/smallcart-setup.log
+  - chown ec2-user:ec2-user /var/log/smallcart-setup.log
+  - 'echo "$(date): SmallCart EC2 instance setup completed" >> /var/log/smallcart-setup.log'
+  - 'echo "$(date): Python version: $(python3 --version)" >> /var/log/smallcart-setup.log'
+  - 'echo "$(date): Pip version: $(pip3 --version)" >> /var/log/smallcart-setup.log'
+  - 'echo "Setup completed at: $(date)" >> /opt/smallcart/instance-status.txt'
 """
         
         try:
             response = self.ec2_client.run_instances(
                 ImageId=self.ami_id,
-                MinCount=1,
-                MaxCount=1,
+                MinCount=count,
+                MaxCount=count,
                 InstanceType=self.instance_type,
                 KeyName=self.key_pair_name,
                 SecurityGroupIds=[self.resources['security_group_id']],
@@ -307,39 +403,46 @@ echo "Setup completed at: $(date)" >> /opt/smallcart/instance-status.txt
                 ]
             )
             
-            instance_id = response['Instances'][0]['InstanceId']
-            self.resources['instance_id'] = instance_id
+            instance_ids = [instance['InstanceId'] for instance in response['Instances']]
+            self._record_resource('instance_ids', instance_ids)
+            # The first instance is the primary one shown in the summary
+            self._record_resource('instance_id', instance_ids[0])
+            self._push_cleanup(self._terminate_instances, InstanceIds=instance_ids)
             
-            print(f"✅ EC2 Instance created: {instance_id}")
-            print("   🔄 Waiting for instance to be in running state...")
+            logger.info("✅ EC2 Instance created: %s", ', '.join(instance_ids))
+            logger.info("   🔄 Waiting for instance to be in running state...")
             
-            # Wait for instance to be running
+            # One waiter polls every instance with a single DescribeInstances per attempt
             waiter = self.ec2_client.get_waiter('instance_running')
-            waiter.wait(InstanceIds=[instance_id])
+            waiter.wait(InstanceIds=instance_ids, WaiterConfig=self.waiter_config)
             
             # Get instance details
-            instances = self.ec2_client.describe_instances(InstanceIds=[instance_id])
-            instance = instances['Reservations'][0]['Instances'][0]
-            
-            public_ip = instance.get('PublicIpAddress')
-            private_ip = instance.get('PrivateIpAddress')
-            
-            self.resources['public_ip'] = public_ip
-            self.resources['private_ip'] = private_ip
-            
-            print(f"✅ Instance is now running!")
-            print(f"   📍 Public IP: {public_ip}")
-            print(f"   📍 Private IP: {private_ip}")
-            
-            return instance_id
+            reservations = self.ec2_client.describe_instances(InstanceIds=instance_ids)['Reservations']
+            instances = {
+                instance['InstanceId']: instance
+                for reservation in reservations
+                for instance in reservation['Instances']
+            }
+            
+            logger.info("✅ Instance is now running!")
+            for instance_id in instance_ids:
+                public_ip = instances[instance_id].get('PublicIpAddress')
+                private_ip = instances[instance_id].get('PrivateIpAddress')
+                if instance_id == instance_ids[0]:
+                    self._record_resource('public_ip', public_ip)
+                    self._record_resource('private_ip', private_ip)
+                logger.info("   📍 %s Public IP: %s", instance_id, public_ip)
+                logger.info("   📍 %s Private IP: %s", instance_id, private_ip)
+            
+            return instance_ids
             
         except Exception as e:
-            print(f"❌ Error creating EC2 instance: {str(e)}")
+            logger.error("❌ Error creating EC2 instance: %s", e)
             raise
     
     def save_infrastructure_info(self):
         """Save infrastructure information to a JSON file"""
-        print("\n💾 Saving infrastructure information...")
+        logger.info("\n💾 Saving infrastructure information...")
         
         infrastructure_info = {
             'project_name': self.project_name,
@@ -363,119 +466,159 @@ echo "Setup completed at: $(date)" >> /opt/smallcart/instance-status.txt
         }
         
         try:
-            with open('smallcart-infrastructure.json', 'w') as f:
-                json.dump(infrastructure_info, f, indent=2)
+            if orjson is not None:
+                payload = orjson.dumps(infrastructure_info, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(infrastructure_info, indent=2).encode('utf-8')
+            with open('smallcart-infrastructure.json', 'wb') as f:
+                f.write(payload)
             
-            print("✅ Infrastructure information saved to 'smallcart-infrastructure.json'")
+            logger.info("✅ Infrastructure information saved to 'smallcart-infrastructure.json'")
             return infrastructure_info
             
         except Exception as e:
-            print(f"⚠️  Warning: Could not save infrastructure info: {str(e)}")
+            logger.warning("⚠️  Warning: Could not save infrastructure info: %s", e)
             return infrastructure_info
     
     def print_summary(self):
-        """Print deployment summary"""
-        print("\n" + "="*80)
-        print("🎉 SMALLCART AWS INFRASTRUCTURE DEPLOYMENT COMPLETED!")
-        print("="*80)
-        
-        print(f"\n📋 CREATED RESOURCES:")
-        print(f"   • VPC ID: {self.resources.get('vpc_id')}")
-        print(f"   • Subnet ID: {self.resources.get('subnet_id')}")
-        print(f"   • Internet Gateway ID: {self.resources.get('igw_id')}")
-        print(f"   • Route Table ID: {self.resources.get('route_table_id')}")
-        print(f"   • Security Group ID: {self.resources.get('security_group_id')}")
-        print(f"   • EC2 Instance ID: {self.resources.get('instance_id')}")
-        
-        print(f"\n🌐 CONNECTION INFORMATION:")
+        """Print deployment summary (built up front and written in one call)"""
         public_ip = self.resources.get('public_ip')
+        lines = [
+            "",
+            "="*80,
+            "🎉 SMALLCART AWS INFRASTRUCTURE DEPLOYMENT COMPLETED!",
+            "="*80,
+            "",
+            "📋 CREATED RESOURCES:",
+            f"   • VPC ID: {self.resources.get('vpc_id')}",
+            f"   • Subnet ID: {self.resources.get('subnet_id')}",
+            f"   • Internet Gateway ID: {self.resources.get('igw_id')}",
+            f"   • Route Table ID: {self.resources.get('route_table_id')}",
+            f"   • Security Group ID: {self.resources.get('security_group_id')}",
+            f"   • EC2 Instance ID: {self.resources.get('instance_id')}",
+            "",
+            "🌐 CONNECTION INFORMATION:",
+        ]
         if public_ip:
-            print(f"   • Public IP Address: {public_ip}")
-            print(f"   • SSH Command: ssh -i smallcart.pem ec2-user@{public_ip}")
-            print(f"   • Flask App URL: http://{public_ip}:5000")
+            lines += [
+                f"   • Public IP Address: {public_ip}",
+                f"   • SSH Command: ssh -i smallcart.pem ec2-user@{public_ip}",
+                f"   • Flask App URL: http://{public_ip}:5000",
+            ]
         else:
-            print("   • Public IP: Getting IP address...")
-        
-        print(f"\n🔐 SECURITY:")
-        print(f"   • Key Pair: {self.key_pair_name} (smallcart.pem)")
-        print(f"   • Open Ports: 22 (SSH), 5000 (Flask), 80 (HTTP), 443 (HTTPS)")
-        print(f"   • Access: 0.0.0.0/0 (Internet-facing)")
-        
-        print(f"\n📋 NEXT STEPS:")
-        print(f"   1. Connect to your instance: ssh -i smallcart.pem ec2-user@{public_ip}")
-        print(f"   2. Upload your SmallCart application files")
-        print(f"   3. Install Python dependencies: pip3 install -r requirements.txt")
-        print(f"   4. Run your Flask app: python3 app.py")
-        print(f"   5. Access your app at: http://{public_ip}:5000")
-        
-        print(f"\n💡 TIPS:")
-        print(f"   • The instance is configured with Python 3 and pip")
-        print(f"   • Your application directory: /opt/smallcart")
-        print(f"   • Check setup logs: /var/log/smallcart-setup.log")
-        print(f"   • Infrastructure info saved in: smallcart-infrastructure.json")
-        
-        print("\n" + "="*80)
+            lines.append("   • Public IP: Getting IP address...")
+        lines += [
+            "",
+            "🔐 SECURITY:",
+            f"   • Key Pair: {self.key_pair_name} (smallcart.pem)",
+            "   • Open Ports: 22 (SSH), 5000 (Flask), 80 (HTTP), 443 (HTTPS)",
+            "   • Access: 0.0.0.0/0 (Internet-facing)",
+            "",
+            "📋 NEXT STEPS:",
+            f"   1. Connect to your instance: ssh -i smallcart.pem ec2-user@{public_ip}",
+            "   2. Upload your SmallCart application files",
+            "   3. Install Python dependencies: pip3 install -r requirements.txt",
+            "   4. Initialize the database: flask --app app init-db",
+            "      then start the app: gunicorn -c gunicorn.conf.py app:app",
+            f"   5. Access your app at: http://{public_ip}:5000",
+            "",
+            "💡 TIPS:",
+            "   • The instance is configured with Python 3 and pip",
+            "   • Your application directory: /opt/smallcart",
+            "   • Check setup logs: /var/log/smallcart-setup.log",
+            "   • Infrastructure info saved in: smallcart-infrastructure.json",
+            "",
+            "="*80,
+        ]
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def deploy_infrastructure(self):
         """Deploy complete infrastructure"""
-        print("🚀 STARTING SMALLCART AWS INFRASTRUCTURE DEPLOYMENT")
-        print("="*60)
+        logger.info("🚀 STARTING SMALLCART AWS INFRASTRUCTURE DEPLOYMENT")
+        logger.info("=" * 60)
         
         try:
             # Check if key pair exists
             if not self.check_key_pair():
-                print("\n❌ DEPLOYMENT FAILED: Key pair not found")
-                print("\n📝 TO FIX THIS:")
-                print("   1. Go to AWS Console → EC2 → Key Pairs")
-                print("   2. Import your existing 'smallcart.pem' file, OR")
-                print("   3. Create a new key pair named 'smallcart'")
-                print("   4. Run this script again")
+                logger.error("\n❌ DEPLOYMENT FAILED: Key pair not found")
+                logger.error("\n📝 TO FIX THIS:")
+                logger.error("   1. Go to AWS Console → EC2 → Key Pairs")
+                logger.error("   2. Import your existing 'smallcart.pem' file, OR")
+                logger.error("   3. Create a new key pair named 'smallcart'")
+                logger.error("   4. Run this script again")
                 return False
             
             # Use existing VPC and Internet Gateway
-            print(f"\n🔄 Using existing VPC: {self.resources['vpc_id']}")
-            print(f"🔄 Using existing Internet Gateway: {self.resources['igw_id']}")
+            logger.info("\n🔄 Using existing VPC: %s", self.resources['vpc_id'])
+            logger.info("🔄 Using existing Internet Gateway: %s", self.resources['igw_id'])
+            
+            # Create remaining infrastructure components. The security group only
+            # needs the VPC, so it is built while the subnet -> route table chain runs;
+            # the instance waits for both branches.
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                subnet_future = executor.submit(self.create_subnet)
+                security_group_future = executor.submit(self.create_security_group)
+                route_table_future = executor.submit(self._create_route_table_after, subnet_future)
+                wait([security_group_future, route_table_future])
+                security_group_future.result()
+                route_table_future.result()
             
-            # Create remaining infrastructure components
-            self.create_subnet()
-            self.create_route_table()
-            self.create_security_group()
             self.create_ec2_instance()
             
-            # Save infrastructure information
-            self.save_infrastructure_info()
-            
-            # Print summary
-            self.print_summary()
-            
-            return True
-            
         except Exception as e:
-            print(f"\n❌ DEPLOYMENT FAILED: {str(e)}")
-            print("\n🔧 CLEANUP:")
-            print("   You may need to manually delete any created resources from AWS Console")
+            logger.error("\n❌ DEPLOYMENT FAILED: %s", e)
+            logger.error("\n🔧 CLEANUP: Rolling back resources created by this run...")
+            if not self.rollback():
+                logger.error("   You may need to manually delete the remaining resources from AWS Console")
             return False
+        except BaseException:
+            # Ctrl+C (e.g. during the instance_running waiter) still cleans up, then propagates
+            logger.error("\n❌ DEPLOYMENT INTERRUPTED")
+            logger.error("\n🔧 CLEANUP: Rolling back resources created by this run...")
+            if not self.rollback():
+                logger.error("   You may need to manually delete the remaining resources from AWS Console")
+            raise
+
+        # Nothing to undo once the instance is up; a failure writing the report
+        # below (e.g. BrokenPipeError on stdout) must not tear down a working deployment
+        with self._resources_lock:
+            self._cleanup_stack = []
+        
+        # Save infrastructure information
+        self.save_infrastructure_info()
+        
+        # Print summary
+        self.print_summary()
+        return True
 
 def main():
     """Main function"""
+    # Plain messages on stdout, so the output reads the same as the summary;
+    # only our logger goes to INFO, botocore's chatter stays at WARNING
+    logging.basicConfig(format='%(message)s', stream=sys.stdout)
+    logger.setLevel(logging.INFO)
+    
     print("SmallCart AWS Infrastructure Setup")
     print("This script will create VPC, Subnet, Internet Gateway, Route Table, Security Group, and EC2 Instance")
-    print("\nPress Enter to continue or Ctrl+C to cancel...")
     
-    try:
-        input()
-    except KeyboardInterrupt:
-        print("\n❌ Deployment cancelled by user")
-        return
+    # Only ask for confirmation on a terminal; CI and other automation would
+    # otherwise block forever on input()
+    if sys.stdin.isatty() and os.getenv('SMALLCART_NONINTERACTIVE') != '1':
+        print("\nPress Enter to continue or Ctrl+C to cancel...")
+        try:
+            input()
+        except KeyboardInterrupt:
+            logger.info("\n❌ Deployment cancelled by user")
+            return
     
     # Initialize and deploy infrastructure
     infrastructure = SmallCartAWSInfrastructure()
     success = infrastructure.deploy_infrastructure()
     
     if success:
-        print("\n✅ Deployment completed successfully!")
+        logger.info("\n✅ Deployment completed successfully!")
     else:
-        print("\n❌ Deployment failed!")
+        logger.error("\n❌ Deployment failed!")
 
 if __name__ == '__main__':
     main()
@@ -9,6 +9,8 @@ APP_DIR="/opt/smallcart"
 BACKUP_DIR="/opt/backups"
 LOG_FILE="/var/log/smallcart-deployment.log"
 GIT_REPO_URL="https://github.com/Aishwarya187423/smallcart.git"
+# Matches the gunicorn master/workers (and a legacy `python3 app.py` process)
+APP_PROCESS_PATTERN="gunicorn.*app:app|python.*app.py"
 
 # OpenTelemetry Configuration
 export OTEL_SERVICE_NAME="smallcart-deployment"
@@ -49,15 +51,15 @@ rollback_deployment() {
 stop_application() {
     log_message "🛑 Stopping SmallCart application..."
     
-    if pgrep -f "python.*app.py" > /dev/null; then
+    if pgrep -f "$APP_PROCESS_PATTERN" > /dev/null; then
         log_message "📍 Application is running, stopping it..."
-        pkill -f "python.*app.py" || log_message "⚠️  No application process found to kill"
+        pkill -f "$APP_PROCESS_PATTERN" || log_message "⚠️  No application process found to kill"
         sleep 3
         
         # Double check if process is stopped
-        if pgrep -f "python.*app.py" > /dev/null; then
+        if pgrep -f "$APP_PROCESS_PATTERN" > /dev/null; then
             log_message "⚠️  Force killing application process..."
-            pkill -9 -f "python.*app.py" || true
+            pkill -9 -f "$APP_PROCESS_PATTERN" || true
             sleep 2
         fi
         
@@ -74,6 +76,7 @@ start_application() {
     cd $APP_DIR
     
     # Set application-specific OpenTelemetry environment variables
+    export OTEL_ENABLED=1
     export OTEL_SERVICE_NAME="smallcart-app"
     export OTEL_SERVICE_VERSION="${GITHUB_SHA:-$(date +%Y%m%d-%H%M%S)}"
     export OTEL_RESOURCE_ATTRIBUTES="service.name=smallcart-app,service.version=${OTEL_SERVICE_VERSION},deployment.environment=production,host.name=$(hostname)"
@@ -83,12 +86,13 @@ start_application() {
     export OTEL_LOGS_EXPORTER=otlp
     export OTEL_PYTHON_LOG_CORRELATION=true
     
-    # Start with OpenTelemetry auto-instrumentation
-    nohup opentelemetry-instrument python3 app.py > /var/log/smallcart.log 2>&1 &
+    # Create tables and seed data, then serve with gunicorn (see gunicorn.conf.py)
+    python3 -m flask --app app init-db >> /var/log/smallcart.log 2>&1
+    nohup opentelemetry-instrument gunicorn -c gunicorn.conf.py app:app >> /var/log/smallcart.log 2>&1 &
     
     # Wait and verify startup
     sleep 5
-    if pgrep -f "python.*app.py" > /dev/null; then
+    if pgrep -f "$APP_PROCESS_PATTERN" > /dev/null; then
         log_message "✅ SmallCart application started successfully"
         
         # Health check
@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration for SmallCart Application
+Run with: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+# One worker by default: the OpenTelemetry Prometheus reader behind /metrics keeps
+# its counters per process, so with several workers each scrape would see whichever
+# worker answered and the series would jump and reset. Raise GUNICORN_WORKERS only
+# once app metrics are exported over OTLP to the collector instead.
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+
+# gevent workers monkey-patch sockets before the app is imported, so DB and
+# network waits yield to other in-flight requests. Use 'gevent_pywsgi' if
+# HTTP parsing shows up in profiles. pysqlite calls can't yield and would block
+# the whole gevent hub (e.g. while waiting on SQLite's write lock), so SQLite
+# deployments default to threads instead.
+uses_sqlite = os.getenv('DATABASE_URL', 'sqlite:///smallcart.db').startswith('sqlite')
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread' if uses_sqlite else 'gevent')
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_connections = 1000
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
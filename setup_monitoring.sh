@@ -198,7 +198,7 @@ cat > /opt/grafana/dashboards/smallcart-overview.json << 'EOF'
         "type": "stat",
         "targets": [
           {
-            "expr": "rate(http_requests_total[5m])",
+            "expr": "sum(rate(http_server_duration_milliseconds_count[5m]))",
             "refId": "A"
           }
         ],
@@ -234,12 +234,12 @@ cat > /opt/grafana/dashboards/smallcart-overview.json << 'EOF'
         "type": "graph",
         "targets": [
           {
-            "expr": "histogram_quantile(0.95, http_request_duration_seconds_bucket)",
+            "expr": "histogram_quantile(0.95, sum by (le) (rate(http_server_duration_milliseconds_bucket[5m])))",
             "refId": "A",
             "legendFormat": "95th percentile"
           },
           {
-            "expr": "histogram_quantile(0.50, http_request_duration_seconds_bucket)",
+            "expr": "histogram_quantile(0.50, sum by (le) (rate(http_server_duration_milliseconds_bucket[5m])))",
             "refId": "B",
             "legendFormat": "50th percentile"
           }
@@ -1,34 +1,51 @@
 from flask import Response
+import threading
 import time
 import os
 
+class _Counter:
+    """Monotonic counter that stays correct without the GIL"""
+    
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+    
+    def inc(self):
+        with self._lock:
+            self._value += 1
+    
+    @property
+    def value(self):
+        return self._value
+
 # Simple metrics without OpenTelemetry dependencies
-app_start_time = time.time()
-request_count = 0
-error_count = 0
+app_start_time = time.monotonic_ns()
+request_counter = _Counter()
+error_counter = _Counter()
 
-def generate_simple_metrics():
-    """Generate simple Prometheus metrics"""
-    global request_count, error_count
-    uptime = time.time() - app_start_time
-    
-    metrics = f"""# HELP smallcart_uptime_seconds Application uptime in seconds
+# Static HELP/TYPE lines and the info sample are built once; each scrape
+# only formats the three dynamic values into it
+_METRICS_TEMPLATE = """# HELP smallcart_uptime_seconds Application uptime in seconds
 # TYPE smallcart_uptime_seconds counter
-smallcart_uptime_seconds {uptime:.2f}
+smallcart_uptime_seconds %.2f
 
 # HELP smallcart_requests_total Total number of HTTP requests
 # TYPE smallcart_requests_total counter
-smallcart_requests_total {request_count}
+smallcart_requests_total %d
 
 # HELP smallcart_errors_total Total number of HTTP errors
 # TYPE smallcart_errors_total counter
-smallcart_errors_total {error_count}
+smallcart_errors_total %d
 
 # HELP smallcart_info Application information
 # TYPE smallcart_info gauge
-smallcart_info{{version="1.0.0",environment="production"}} 1
+smallcart_info{version="1.0.0",environment="production"} 1
 """
-    return metrics
+
+def generate_simple_metrics():
+    """Generate simple Prometheus metrics"""
+    uptime = (time.monotonic_ns() - app_start_time) / 1e9
+    return _METRICS_TEMPLATE % (uptime, request_counter.value, error_counter.value)
 
 def add_simple_metrics_endpoint(app):
     """Add a simple /metrics endpoint to Flask app"""
@@ -41,14 +58,12 @@ def add_simple_metrics_endpoint(app):
     @app.before_request
     def count_requests():
         """Count incoming requests"""
-        global request_count
-        request_count += 1
+        request_counter.inc()
     
     @app.errorhandler(500)
     def count_errors(error):
         """Count server errors"""
-        global error_count
-        error_count += 1
+        error_counter.inc()
         return error
 
 def log_simple(message, level="INFO"):
@@ -4,23 +4,20 @@ OpenTelemetry Configuration for SmallCart Application
 
 import os
 import logging
+from contextlib import nullcontext
+# Only the lightweight API is imported eagerly; the SDK, exporters (grpc/protobuf)
+# and instrumentors are imported when telemetry is actually enabled
 from opentelemetry import trace, metrics
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
-from opentelemetry.exporter.prometheus import PrometheusMetricReader
-from opentelemetry.instrumentation.flask import FlaskInstrumentor
-from opentelemetry.instrumentation.sqlite3 import SQLite3Instrumentor
-from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
-from opentelemetry.instrumentation.requests import RequestsInstrumentor
-from prometheus_client import start_http_server, generate_latest, CONTENT_TYPE_LATEST
+
+def telemetry_enabled():
+    """OpenTelemetry instrumentation is opt-in via OTEL_ENABLED=1"""
+    return os.getenv('OTEL_ENABLED') == '1'
 
 def configure_telemetry():
     """Configure OpenTelemetry for SmallCart application"""
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.exporter.prometheus import PrometheusMetricReader
     
     # Service information
     service_name = os.getenv('OTEL_SERVICE_NAME', 'smallcart-app')
@@ -34,7 +31,8 @@ def configure_telemetry():
         "environment": environment,
     })
     
-    # Configure tracing (disabled for now to avoid OTLP issues)
+    # Configure tracing (disabled for now to avoid OTLP issues); re-enabling needs
+    # TracerProvider, BatchSpanProcessor and OTLPSpanExporter imported here
     # trace.set_tracer_provider(TracerProvider(resource=resource))
     # tracer_provider = trace.get_tracer_provider()
     
@@ -63,19 +61,8 @@ def configure_telemetry():
     tracer = None  # Disabled tracing for now
     meter = metrics.get_meter(__name__)
     
-    # Create custom metrics
-    request_counter = meter.create_counter(
-        name="http_requests_total",
-        description="Total number of HTTP requests",
-        unit="1"
-    )
-    
-    request_duration = meter.create_histogram(
-        name="http_request_duration_seconds",
-        description="Duration of HTTP requests",
-        unit="s"
-    )
-    
+    # Create custom metrics; request count and latency come from FlaskInstrumentor's
+    # http.server.duration histogram
     user_registrations = meter.create_counter(
         name="user_registrations_total",
         description="Total number of user registrations",
@@ -97,8 +84,6 @@ def configure_telemetry():
     return {
         'tracer': tracer,
         'meter': meter,
-        'request_counter': request_counter,
-        'request_duration': request_duration,
         'user_registrations': user_registrations,
         'orders_total': orders_total,
         'active_users': active_users,
@@ -107,6 +92,14 @@ def configure_telemetry():
 def instrument_flask_app(app):
     """Instrument Flask application with OpenTelemetry"""
     
+    if not telemetry_enabled():
+        return app
+    
+    from opentelemetry.instrumentation.flask import FlaskInstrumentor
+    from opentelemetry.instrumentation.sqlite3 import SQLite3Instrumentor
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    from opentelemetry.instrumentation.requests import RequestsInstrumentor
+    
     # Configure telemetry
     telemetry = configure_telemetry()
     
@@ -120,38 +113,6 @@ def instrument_flask_app(app):
     # Auto-instrument HTTP requests
     RequestsInstrumentor().instrument()
     
-    # Add custom middleware for metrics
-    @app.before_request
-    def before_request():
-        from flask import request
-        import time
-        
-        # Start timing the request
-        request.start_time = time.time()
-        
-        # Increment request counter
-        telemetry['request_counter'].add(1, {
-            "method": request.method,
-            "endpoint": request.endpoint or "unknown",
-            "status_code": "pending"
-        })
-    
-    @app.after_request
-    def after_request(response):
-        from flask import request
-        import time
-        
-        # Calculate request duration
-        if hasattr(request, 'start_time'):
-            duration = time.time() - request.start_time
-            telemetry['request_duration'].record(duration, {
-                "method": request.method,
-                "endpoint": request.endpoint or "unknown",
-                "status_code": str(response.status_code)
-            })
-        
-        return response
-    
     # Store telemetry objects in app config for use in routes
     app.config['telemetry'] = telemetry
     
@@ -161,28 +122,32 @@ def instrument_flask_app(app):
     return app
 
 def create_custom_span(tracer, name, attributes=None):
-    """Helper function to create custom spans"""
-    span = tracer.start_span(name)
-    if attributes:
-        for key, value in attributes.items():
-            span.set_attribute(key, value)
-    return span
+    """Context manager for a custom span; a no-op when tracing is disabled
+
+    Usage: ``with create_custom_span(tracer, 'checkout', {'user_id': uid}):``
+    """
+    if tracer is None:
+        return nullcontext()
+    return tracer.start_as_current_span(name, attributes=attributes or {})
+
+_logger = logging.getLogger(__name__)
 
 def log_with_trace(message, level=logging.INFO):
-    """Log messages with trace correlation"""
-    current_span = trace.get_current_span()
-    if current_span:
-        trace_id = current_span.get_span_context().trace_id
-        span_id = current_span.get_span_context().span_id
-        formatted_message = f"[trace_id={trace_id:032x} span_id={span_id:016x}] {message}"
+    """Log messages with trace correlation; formatting is deferred to the handler"""
+    if not _logger.isEnabledFor(level):
+        return
+    span = trace.get_current_span()
+    ctx = span.get_span_context() if span else None
+    # INVALID_SPAN (no active trace) carries trace_id 0
+    if ctx and ctx.trace_id:
+        _logger.log(level, "[trace_id=%032x span_id=%016x] %s", ctx.trace_id, ctx.span_id, message)
     else:
-        formatted_message = message
-    
-    logging.log(level, formatted_message)
+        _logger.log(level, message)
 
 def add_metrics_endpoint(app):
     """Add /metrics endpoint for Prometheus scraping"""
     from flask import Response
+    from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
     
     @app.route('/metrics')
     def metrics():